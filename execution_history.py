@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Ingest Xray Test Execution exports into a per-test run history.
+Keeps a rolling window of outcomes for every test and derives flakiness,
+last pass/fail and failure streaks. Only execution files not seen by an
+earlier run (same name, size and modification time) are read, so hundreds
+of exports stay cheap to refresh; runs already recorded from an earlier
+export of the same execution are skipped.
+"""
+
+import base64
+import csv
+import json
+import os
+import tempfile
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+# Outcome codes stored in the rolling windows
+PASS, FAIL, OTHER = 0, 1, 2
+
+TEST_KEY_COLUMNS = ['Test Key', 'Test', 'Key', 'Issue key']
+STATUS_COLUMNS = ['Test Run Status', 'TestRun Status', 'Status', 'Test Status']
+TIME_COLUMNS = ['Finished On', 'Executed On', 'Started On']
+EXECUTION_COLUMNS = ['Test Execution Key', 'Test Execution', 'Execution Key']
+
+# Jira's default date-time formats, tried after ISO 8601
+RUN_TIME_FORMATS = ['%d/%b/%y %I:%M %p', '%d/%b/%y %H:%M', '%d/%m/%Y %H:%M', '%d/%m/%Y %H:%M:%S']
+
+
+def outcome_code(status):
+    """Map an Xray test run status to PASS, FAIL or OTHER."""
+    status_upper = status.upper()
+    if 'PASS' in status_upper or status_upper == 'DONE':
+        return PASS
+    if 'FAIL' in status_upper:
+        return FAIL
+    return OTHER
+
+
+def parse_run_time(value):
+    """Parse an exported run time; aware times become naive UTC. None if unknown."""
+    value = value.strip()
+    try:
+        run_time = datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith('Z') else value)
+    except ValueError:
+        for time_format in RUN_TIME_FORMATS:
+            try:
+                run_time = datetime.strptime(value, time_format)
+                break
+            except ValueError:
+                continue
+        else:
+            return None
+    if run_time.tzinfo is not None:
+        run_time = run_time.astimezone(timezone.utc).replace(tzinfo=None)
+    return run_time
+
+
+def file_identity(path):
+    """Name, size and modification time, so a re-exported file counts as new."""
+    stat = path.stat()
+    return f'{path.name}:{stat.st_size}:{stat.st_mtime_ns}'
+
+
+def _first_value(row, columns):
+    for column in columns:
+        value = (row.get(column) or '').strip()
+        if value:
+            return value
+    return ''
+
+
+def iter_execution_rows(paths):
+    """Stream (file name, row) pairs from many execution exports in turn.
+
+    One reader serves every file; the delimiter (';' or ',') is detected
+    per file from its header line.
+    """
+    for path in paths:
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            header = f.readline()
+            delimiter = ';' if header.count(';') > header.count(',') else ','
+            f.seek(0)
+            for row in csv.DictReader(f, delimiter=delimiter):
+                yield path.name, row
+
+
+class ExecutionHistory:
+    """Per-test rolling windows of run outcomes plus all-time counters."""
+
+    def __init__(self, window=30):
+        self.window = window
+        self.files = []
+        self.outcomes = {}
+        self.stats = {}
+
+    @classmethod
+    def load(cls, state_file, window=30):
+        """Load a saved history, or start an empty one if there is none."""
+        history = cls(window)
+        state_file = Path(state_file)
+        if not state_file.exists():
+            return history
+
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        history.files = state['files']
+        history.stats = state['tests']
+        for test_key, encoded in state['outcomes'].items():
+            outcomes = array('B', base64.b64decode(encoded))
+            history.outcomes[test_key] = outcomes[-window:]
+        return history
+
+    def save(self, state_file):
+        """Write the history atomically so an interrupted run keeps the old one."""
+        state = {
+            'files': self.files,
+            'tests': self.stats,
+            'outcomes': {
+                test_key: base64.b64encode(outcomes.tobytes()).decode('ascii')
+                for test_key, outcomes in self.outcomes.items()
+            }
+        }
+        state_file = Path(state_file)
+        fd, tmp_name = tempfile.mkstemp(prefix=state_file.name + '.', suffix='.tmp',
+                                        dir=state_file.parent)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_name, state_file)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+
+    def record(self, test_key, status, when, execution=''):
+        """Append one test run outcome, unless it is not newer than the history.
+
+        when is an ISO 8601 run time. Runs older than the test's newest
+        recorded run, or at the same time from an execution already recorded,
+        are skipped so windows and streaks stay in run order. Returns whether
+        the run was recorded.
+        """
+        stats = self.stats.setdefault(test_key, {
+            'runs': 0,
+            'last_pass': None,
+            'last_fail': None,
+            'failure_streak': 0,
+            'max_failure_streak': 0
+        })
+        last_run = stats.get('last_run')
+        if last_run is not None and when <= last_run:
+            if when < last_run or execution in stats['last_run_executions']:
+                return False
+            stats['last_run_executions'].append(execution)
+        else:
+            stats['last_run'] = when
+            stats['last_run_executions'] = [execution]
+
+        code = outcome_code(status)
+        outcomes = self.outcomes.setdefault(test_key, array('B'))
+        outcomes.append(code)
+        if len(outcomes) > self.window:
+            del outcomes[:len(outcomes) - self.window]
+
+        stats['runs'] += 1
+        if code == PASS:
+            stats['last_pass'] = when
+            stats['failure_streak'] = 0
+        elif code == FAIL:
+            stats['last_fail'] = when
+            stats['failure_streak'] += 1
+            stats['max_failure_streak'] = max(stats['max_failure_streak'], stats['failure_streak'])
+        return True
+
+    def ingest(self, execution_files):
+        """Record the runs of every execution file not ingested before.
+
+        Files are identified by name, size and modification time, and a run
+        by its time and execution (the execution key column, or the file
+        name), so a re-exported file only adds its new runs. The runs of a
+        batch are recorded in run time order; rows without a readable run time
+        fall back to their file's modification time (in UTC, like parsed
+        times). Returns the number of new files.
+        """
+        seen = set(self.files)
+        new_files = [(path, file_identity(path)) for path in map(Path, execution_files)]
+        new_files = [(path, identity) for path, identity in new_files if identity not in seen]
+
+        runs = []
+        for path, _ in new_files:
+            file_time = datetime.fromtimestamp(path.stat().st_mtime, tz=timezone.utc).replace(tzinfo=None)
+            for file_name, row in iter_execution_rows([path]):
+                test_key = _first_value(row, TEST_KEY_COLUMNS)
+                if test_key:
+                    run_time = parse_run_time(_first_value(row, TIME_COLUMNS)) or file_time
+                    execution = _first_value(row, EXECUTION_COLUMNS) or file_name
+                    runs.append((run_time, len(runs), test_key, _first_value(row, STATUS_COLUMNS), execution))
+
+        runs.sort()
+        for run_time, _, test_key, status, execution in runs:
+            self.record(test_key, status, run_time.isoformat(timespec='seconds'), execution)
+
+        self.files.extend(identity for _, identity in new_files)
+        return len(new_files)
+
+    def flakiness(self, test_key):
+        """Share of consecutive pass/fail runs in the window that flip outcome."""
+        decided = [code for code in self.outcomes.get(test_key, ()) if code != OTHER]
+        if len(decided) < 2:
+            return 0.0
+        flips = sum(1 for previous, current in zip(decided, decided[1:]) if previous != current)
+        return flips / (len(decided) - 1)
+
+    def summarize(self, tests, stories):
+        """Per-test analytics linked to the stories and epics each test covers.
+
+        tests and stories are the dicts from build_traceability_model().
+        Tests that never ran in an ingested execution are left out; a test
+        linked straight to an epic lists that epic.
+        """
+        summary = {}
+        for test_key, stats in self.stats.items():
+            linked_stories = sorted(tests[test_key]['stories']) if test_key in tests else []
+            summary[test_key] = dict(
+                stats,
+                summary=tests[test_key]['summary'] if test_key in tests else '',
+                window=len(self.outcomes.get(test_key, ())),
+                flakiness=self.flakiness(test_key),
+                stories=linked_stories,
+                epics=sorted({stories[s]['epic_key'] if s in stories else s for s in linked_stories})
+            )
+        return summary
@@ -4,10 +4,26 @@ Generate Requirements Traceability Dashboard from Jira Xray Report
 Reads the Requirement Traceability Report CSV and creates an interactive HTML dashboard.
 """
 
+import argparse
 import csv
+import json
+import os
 from collections import defaultdict
 from pathlib import Path
 import re
+import tempfile
+import time
+
+
+# Normalized test statuses, in display order
+TEST_STATUSES = ['PASSED', 'FAILED', 'NOTRUN', 'TO DO']
+
+# Pivot cube wildcard and the test status of stories without tests
+PIVOT_ALL = '*'
+NO_TESTS = 'NO TESTS'
+
+# Tests covering at least this many requirements are highlighted as shared
+SHARED_TEST_STORIES = 3
 
 
 def natural_sort_key(text):
@@ -21,118 +37,298 @@ def natural_sort_key(text):
     return parts
 
 
-def parse_traceability_report(csv_file):
-    """Parse the Requirements Traceability Report CSV."""
+def read_traceability_rows(csv_file):
+    """Yield the rows of a Requirements Traceability Report CSV."""
+    with open(csv_file, 'r', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f, delimiter=';')
+        for row in reader:
+            yield row
+
+
+def build_traceability_model(rows, stats=None):
+    """Build the epic/story/test model from traceability report rows.
+    
+    Rows are dicts keyed by the report's column names, so rows read from a CSV
+    export and rows fetched from the Jira/Xray REST API give the same model.
+    If a stats dict is given, the number of rows parsed is recorded in it.
+    """
     epics = {}
     stories = {}
     tests = {}
     project_name = None
+    rows_parsed = 0
     
-    with open(csv_file, 'r', encoding='utf-8-sig') as f:
-        reader = csv.DictReader(f, delimiter=';')
-        
-        for row in reader:
-            parent_key = (row.get('Parent Requirement Key') or '').strip()
-            parent_summary = (row.get('Parent Requirement Summary') or '').strip()
-            req_key = (row.get('Requirement Key') or '').strip()
-            req_summary = (row.get('Requirement Summary') or '').strip()
-            req_status = (row.get('Requirement Status') or '').strip()
-            test_key = (row.get('Test Key') or '').strip()
-            test_summary = (row.get('Test Summary') or '').strip()
-            test_status = (row.get('Test Status') or '').strip()
-            
-            # Extract project name from first row with data
-            if project_name is None:
-                project_name = (row.get('Project name') or row.get('Project key') or '').strip()
-                # If no project field, extract from issue key (e.g., TML40 from TML40-531)
-                if not project_name and req_key:
-                    parts = req_key.split('-')
-                    if len(parts) >= 2:
-                        project_name = parts[0]
-            
-            # Handle epics (parent requirements without parents)
-            if parent_key and parent_key not in epics:
-                epics[parent_key] = {
-                    'summary': parent_summary,
-                    'stories': {}
-                }
-            
-            # Handle stories (requirements)
-            if req_key:
-                if parent_key:
-                    # Story with a parent (epic)
-                    if req_key not in stories:
-                        stories[req_key] = {
-                            'epic_key': parent_key,
+    for row in rows:
+        rows_parsed += 1
+        parent_key = (row.get('Parent Requirement Key') or '').strip()
+        parent_summary = (row.get('Parent Requirement Summary') or '').strip()
+        req_key = (row.get('Requirement Key') or '').strip()
+        req_summary = (row.get('Requirement Summary') or '').strip()
+        req_status = (row.get('Requirement Status') or '').strip()
+        test_key = (row.get('Test Key') or '').strip()
+        test_summary = (row.get('Test Summary') or '').strip()
+        test_status = (row.get('Test Status') or '').strip()
+        
+        # Extract project name from first row with data
+        if project_name is None:
+            project_name = (row.get('Project name') or row.get('Project key') or '').strip()
+            # If no project field, extract from issue key (e.g., TML40 from TML40-531)
+            if not project_name and req_key:
+                parts = req_key.split('-')
+                if len(parts) >= 2:
+                    project_name = parts[0]
+        
+        # Handle epics (parent requirements without parents)
+        if parent_key and parent_key not in epics:
+            epics[parent_key] = {
+                'summary': parent_summary,
+                'stories': {}
+            }
+        
+        # Handle stories (requirements)
+        if req_key:
+            if parent_key:
+                # Story with a parent (epic)
+                if req_key not in stories:
+                    stories[req_key] = {
+                        'epic_key': parent_key,
+                        'summary': req_summary,
+                        'status': req_status,
+                        'tests': {}
+                    }
+                
+                # Add story to epic
+                if parent_key in epics:
+                    if req_key not in epics[parent_key]['stories']:
+                        epics[parent_key]['stories'][req_key] = {
                             'summary': req_summary,
                             'status': req_status,
                             'tests': {}
                         }
-                    
-                    # Add story to epic
-                    if parent_key in epics:
-                        if req_key not in epics[parent_key]['stories']:
-                            epics[parent_key]['stories'][req_key] = {
-                                'summary': req_summary,
-                                'status': req_status,
-                                'tests': {}
-                            }
-                else:
-                    # Story without a parent (is itself an epic)
-                    if req_key not in epics:
-                        epics[req_key] = {
-                            'summary': req_summary,
-                            'stories': {}
-                        }
-            
-            # Handle tests
-            if test_key and req_key:
-                # Normalize test status
-                status_upper = test_status.upper()
-                if 'PASS' in status_upper or status_upper == 'DONE':
-                    normalized_status = 'PASSED'
-                elif 'FAIL' in status_upper:
-                    normalized_status = 'FAILED'
-                elif 'NOTRUN' in status_upper or 'NOT RUN' in status_upper:
-                    normalized_status = 'NOTRUN'
-                else:
-                    normalized_status = 'TO DO'
-                
-                if test_key not in tests:
-                    tests[test_key] = {
-                        'summary': test_summary,
-                        'status': normalized_status,
-                        'stories': set()
+            else:
+                # Story without a parent (is itself an epic)
+                if req_key not in epics:
+                    epics[req_key] = {
+                        'summary': req_summary,
+                        'stories': {}
                     }
+        
+        # Handle tests
+        if test_key and req_key:
+            # Normalize test status
+            status_upper = test_status.upper()
+            if 'PASS' in status_upper or status_upper == 'DONE':
+                normalized_status = 'PASSED'
+            elif 'FAIL' in status_upper:
+                normalized_status = 'FAILED'
+            elif 'NOTRUN' in status_upper or 'NOT RUN' in status_upper:
+                normalized_status = 'NOTRUN'
+            else:
+                normalized_status = 'TO DO'
+            
+            if test_key not in tests:
+                tests[test_key] = {
+                    'summary': test_summary,
+                    'status': normalized_status,
+                    'stories': set()
+                }
+            
+            tests[test_key]['stories'].add(req_key)
+            
+            # Add test to story
+            if req_key in stories:
+                stories[req_key]['tests'][test_key] = {
+                    'summary': test_summary,
+                    'status': normalized_status
+                }
                 
-                tests[test_key]['stories'].add(req_key)
-                
-                # Add test to story
-                if req_key in stories:
-                    stories[req_key]['tests'][test_key] = {
-                        'summary': test_summary,
-                        'status': normalized_status
-                    }
-                    
-                    # Add test to epic's story
-                    epic_key = stories[req_key]['epic_key']
-                    if epic_key in epics and req_key in epics[epic_key]['stories']:
-                        epics[epic_key]['stories'][req_key]['tests'][test_key] = {
-                            'summary': test_summary,
-                            'status': normalized_status
-                        }
-                elif req_key in epics:
-                    # Test linked directly to an epic
-                    if '_direct_tests' not in epics[req_key]:
-                        epics[req_key]['_direct_tests'] = {}
-                    epics[req_key]['_direct_tests'][test_key] = {
+                # Add test to epic's story
+                epic_key = stories[req_key]['epic_key']
+                if epic_key in epics and req_key in epics[epic_key]['stories']:
+                    epics[epic_key]['stories'][req_key]['tests'][test_key] = {
                         'summary': test_summary,
                         'status': normalized_status
                     }
+            elif req_key in epics:
+                # Test linked directly to an epic
+                if '_direct_tests' not in epics[req_key]:
+                    epics[req_key]['_direct_tests'] = {}
+                epics[req_key]['_direct_tests'][test_key] = {
+                    'summary': test_summary,
+                    'status': normalized_status
+                }
+
+    if stats is not None:
+        stats['rows_parsed'] = rows_parsed
     
     return epics, stories, tests, project_name or 'Project'
 
 
+def parse_traceability_report(csv_file):
+    """Parse the Requirements Traceability Report CSV."""
+    return build_traceability_model(read_traceability_rows(csv_file))
+
+
+def build_pivot_cube(stories):
+    """Precompute story/test counts for epic x requirement status x test status.
+    
+    Every cell is also rolled up into PIVOT_ALL for each dimension, so any
+    filter combination is a single lookup. Stories without tests fall under
+    the NO_TESTS test status. Returns {(epic, req_status, test_status):
+    {'stories': n, 'tests': n, 'links': n}} with distinct story and test counts.
+    """
+    cells = defaultdict(lambda: (set(), set(), [0]))
+    
+    for story_key, story in stories.items():
+        tests_by_status = defaultdict(list)
+        for test_key, test_data in story['tests'].items():
+            tests_by_status[test_data['status']].append(test_key)
+        if not tests_by_status:
+            tests_by_status[NO_TESTS] = []
+        
+        req_status = story['status'] or 'No Status'
+        for test_status, test_keys in tests_by_status.items():
+            for epic_key in (story['epic_key'], PIVOT_ALL):
+                for req in (req_status, PIVOT_ALL):
+                    for status in (test_status, PIVOT_ALL):
+                        cell_stories, cell_tests, cell_links = cells[(epic_key, req, status)]
+                        cell_stories.add(story_key)
+                        cell_tests.update(test_keys)
+                        cell_links[0] += len(test_keys)
+    
+    return {
+        key: {'stories': len(cell_stories), 'tests': len(cell_tests), 'links': cell_links[0]}
+        for key, (cell_stories, cell_tests, cell_links) in cells.items()
+    }
+
+
+def build_requirement_tree(epics, stories):
+    """Build a requirement tree of arbitrary depth from the parent links.
+    
+    Returns {key: node} where each node has 'summary', 'status', 'parent'
+    (None for roots), 'children' (adjacency list of keys) and its own 'tests'.
+    Initiatives -> epics -> stories -> sub-tasks all keep their level instead
+    of being flattened into epic/story pairs.
+    """
+    nodes = {}
+    for key, epic_data in epics.items():
+        nodes[key] = {
+            'summary': epic_data['summary'],
+            'status': '',
+            'parent': None,
+            'children': [],
+            'tests': dict(epic_data.get('_direct_tests', {}))
+        }
+    for key, story in stories.items():
+        node = nodes.setdefault(key, {'parent': None, 'children': [], 'tests': {}})
+        node['summary'] = story['summary']
+        node['status'] = story['status']
+        node['parent'] = story['epic_key']
+        node['tests'].update(story['tests'])
+    
+    for key, node in nodes.items():
+        if node['parent'] is not None:
+            nodes[node['parent']]['children'].append(key)
+    
+    # Break parent cycles so every requirement hangs below a root
+    reached = set()
+    for key in list(nodes):
+        if key in reached:
+            continue
+        chain = []
+        while key is not None and key not in reached and key not in chain:
+            chain.append(key)
+            key = nodes[key]['parent']
+        if key is not None and key in chain:
+            nodes[nodes[key]['parent']]['children'].remove(key)
+            nodes[key]['parent'] = None
+        reached.update(chain)
+    
+    return nodes
+
+
+def rollup_requirement_tree(nodes):
+    """Compute coverage and test status rollups for every requirement.
+    
+    A single post-order pass walks children before parents; each node stores
+    a 'rollup' dict shaped like calculate_metrics() output, covering all its
+    descendants and the distinct tests linked anywhere in its subtree. Test
+    sets are merged smaller-into-larger, so the dedup stays near linear.
+    """
+    # Pre-order with the last child first; reversed, it is a post-order that
+    # visits children first-to-last, the order calculate_metrics() walks them.
+    order = []
+    stack = [key for key, node in nodes.items() if node['parent'] is None]
+    while stack:
+        key = stack.pop()
+        order.append(key)
+        stack.extend(nodes[key]['children'])
+    
+    # Each subtree maps test key -> (link rank, status); like calculate_metrics()
+    # a test counts under the status of its first link in walk order.
+    subtree_tests = {}
+    rank = 0
+    for key in reversed(order):
+        node = nodes[key]
+        tests = {}
+        counts = defaultdict(int)
+        total = covered = 0
+        
+        for child_key in node['children']:
+            child_tests, child_counts = subtree_tests.pop(child_key)
+            child_rollup = nodes[child_key]['rollup']
+            total += 1 + child_rollup['total_stories']
+            covered += bool(nodes[child_key]['tests']) + child_rollup['covered_stories']
+            
+            if len(child_tests) > len(tests):
+                tests, child_tests = child_tests, tests
+                counts, child_counts = child_counts, counts
+            for test_key, (test_rank, status) in child_tests.items():
+                if test_key not in tests:
+                    tests[test_key] = (test_rank, status)
+                    counts[status] += 1
+                elif test_rank < tests[test_key][0]:
+                    counts[tests[test_key][1]] -= 1
+                    tests[test_key] = (test_rank, status)
+                    counts[status] += 1
+        
+        for test_key, test_data in node['tests'].items():
+            if test_key not in tests:
+                tests[test_key] = (rank, test_data['status'])
+                counts[test_data['status']] += 1
+            rank += 1
+        
+        subtree_tests[key] = (tests, counts)
+        node['rollup'] = {
+            'total_stories': total,
+            'covered_stories': covered,
+            'uncovered_stories': total - covered,
+            'coverage_percent': (covered / total * 100) if total > 0 else 0,
+            'total_tests': len(tests),
+            'passed_tests': counts.get('PASSED', 0),
+            'failed_tests': counts.get('FAILED', 0),
+            'notrun_tests': counts.get('NOTRUN', 0),
+            'todo_tests': counts.get('TO DO', 0)
+        }
+    
+    return nodes
+
+
+def root_epic_stories(stories, tree):
+    """Copy stories with 'epic_key' pointing at their top-level requirement.
+    
+    Requirements nested below other stories are grouped under the root of
+    their tree, the same epic that carries them on the dashboard.
+    """
+    root_of = {}
+    stack = [(key, key) for key, node in tree.items() if node['parent'] is None]
+    while stack:
+        key, root = stack.pop()
+        root_of[key] = root
+        stack.extend((child, root) for child in tree[key]['children'])
+    return {key: dict(story, epic_key=root_of[key]) for key, story in stories.items()}
+
+
 def calculate_metrics(epics):
     """Calculate coverage metrics for each epic."""
     metrics = {}
@@ -177,12 +373,369 @@ def calculate_metrics(epics):
     return metrics
 
 
-def generate_html_dashboard(epics, metrics, output_file, project_name='Project', csv_filename='traceability_report.csv'):
-    """Generate an interactive HTML dashboard."""
+def coverage_badge_class(coverage_percent):
+    """Badge class for a coverage percentage."""
+    if coverage_percent >= 80:
+        return 'coverage-high'
+    elif coverage_percent >= 50:
+        return 'coverage-medium'
+    return 'coverage-low'
+
+
+def render_story_item(story_key, story_data, subtree=None):
+    """Render one story with its tests and, from subtree, any nested levels."""
+    has_tests = len(story_data['tests']) > 0
+    coverage_class = 'covered' if has_tests else 'uncovered'
+    
+    html = f"""
+                    <div class="story-item {coverage_class}">
+                        <div class="story-header">
+                            <span class="story-key">{story_key}</span>
+                            <span class="badge {'tests' if has_tests else 'no-stories'}">{len(story_data['tests'])} Tests</span>
+                        </div>
+                        <div class="story-summary">{story_data['summary']}</div>
+"""
+    
+    if has_tests:
+        html += '<div class="tests-list">'
+        for test_key, test_data in story_data['tests'].items():
+            status_lower = test_data['status'].lower().replace(' ', '')
+            html += f"""
+                            <div class="test-item">
+                                <span class="test-key">{test_key}</span>
+                                <span class="test-summary">{test_data['summary']}</span>
+                                <span class="status-badge {status_lower}">{test_data['status']}</span>
+                            </div>
+"""
+        html += '</div>'
+    else:
+        html += '<div class="no-tests">No tests linked to this story</div>'
+    
+    children = subtree[story_key]['children'] if subtree and story_key in subtree else []
+    if children:
+        rollup = subtree[story_key]['rollup']
+        html += f"""
+                        <div class="sublevel">
+                            <div class="sublevel-header" onclick="toggleSublevel(this)">
+                                <span class="sublevel-icon">▶</span>
+                                {len(children)} Sub-requirements
+                                <span class="badge stories">{rollup['total_stories']} Below</span>
+                                <span class="badge tests">{rollup['total_tests']} Tests</span>
+                                <span class="badge {coverage_badge_class(rollup['coverage_percent'])}">{rollup['coverage_percent']:.0f}%</span>
+                            </div>
+                            <div class="sublevel-content">
+"""
+        for child_key in sorted(children, key=lambda k: natural_sort_key(subtree[k]['summary'])):
+            html += render_story_item(child_key, subtree[child_key], subtree)
+        html += '</div></div>'
+    
+    html += '</div>'
+    
+    return html
+
+
+def render_epic_fragment(epic_key, epic_data, m, subtree=None):
+    """Render the HTML card for one epic with its stories and tests.
+    
+    subtree maps the epic's descendants to their requirement tree nodes so
+    deeper levels are rendered nested under their stories.
+    """
+    
+    # Determine coverage badge
+    if m['total_stories'] == 0:
+        coverage_badge = '<span class="badge no-stories">No Stories</span>'
+    else:
+        coverage_class = coverage_badge_class(m['coverage_percent'])
+        coverage_badge = f'<span class="badge {coverage_class}">{m["coverage_percent"]:.0f}%</span>'
+    
+    html = f"""
+            <div class="epic-card" data-epic-key="{epic_key}">
+                <div class="epic-header" onclick="toggleEpic(this)">
+                    <div class="epic-title">
+                        <div class="epic-key">{epic_key}</div>
+                        <div class="epic-summary">{epic_data['summary']}</div>
+                    </div>
+                    <div class="epic-stats">
+                        <span class="badge stories">{m['total_stories']} Stories</span>
+                        <span class="badge tests">{m['total_tests']} Tests</span>
+                        {coverage_badge}
+                        <span class="expand-icon">▼</span>
+                    </div>
+                </div>
+                <div class="epic-content">
+                    <div class="epic-details">
+"""
+    
+    if m['total_stories'] > 0:
+        html += '<div class="stories-list">'
+        
+        # Sort stories by summary
+        sorted_stories = sorted(
+            epic_data['stories'].items(),
+            key=lambda x: natural_sort_key(x[1]['summary'])
+        )
+        
+        for story_key, story_data in sorted_stories:
+            if subtree and story_key in subtree:
+                story_data = subtree[story_key]
+            html += render_story_item(story_key, story_data, subtree)
+        
+        html += '</div>'
+    else:
+        html += '<div class="no-tests">This epic has no stories</div>'
+    
+    # Add direct tests if any
+    if '_direct_tests' in epic_data and epic_data['_direct_tests']:
+        html += '<div class="tests-list" style="margin-top: 15px;">'
+        html += '<div style="font-weight: 600; margin-bottom: 10px; color: #553c9a;">Direct Tests:</div>'
+        for test_key, test_data in epic_data['_direct_tests'].items():
+            status_lower = test_data['status'].lower().replace(' ', '')
+            html += f"""
+                    <div class="test-item">
+                        <span class="test-key">{test_key}</span>
+                        <span class="test-summary">{test_data['summary']}</span>
+                        <span class="status-badge {status_lower}">{test_data['status']}</span>
+                    </div>
+"""
+        html += '</div>'
+    
+    html += """
+                    </div>
+                </div>
+            </div>
+"""
+    
+    return html
+
+
+def _nested_subtree(tree, epic_key):
+    """Descendant nodes of an epic, or None if it has no levels below stories."""
+    children = tree[epic_key]['children']
+    if not any(tree[child]['children'] for child in children):
+        return None
+    subtree = {}
+    stack = list(children)
+    while stack:
+        key = stack.pop()
+        subtree[key] = tree[key]
+        stack.extend(tree[key]['children'])
+    return subtree
+
+
+def render_epic_fragments(sorted_epics, metrics, tree=None):
+    """Yield the epic card HTML in order, so it can be streamed to the file.
+    
+    With a requirement tree, each card lists the epic's children in the tree,
+    the same requirements its rollup counts; a story reported under several
+    epics is only listed under the one the tree keeps.
+    """
+    for epic_key, epic_data in sorted_epics:
+        subtree = None
+        if tree:
+            subtree = _nested_subtree(tree, epic_key)
+            epic_data = dict(epic_data, stories={key: tree[key] for key in tree[epic_key]['children']})
+        yield render_epic_fragment(epic_key, epic_data, metrics[epic_key], subtree)
+
+
+def render_pivot_section(pivot, epics):
+    """Render the pivot filter card and the script reading the cube.
+    
+    Dimension values are sent once and cells are keyed by their indices
+    ("epic|req|test", PIVOT_ALL for any), so the browser never rescans stories.
+    """
+    test_statuses = [s for s in TEST_STATUSES + [NO_TESTS]
+                     if (PIVOT_ALL, PIVOT_ALL, s) in pivot]
+    req_statuses = sorted({req for _, req, _ in pivot if req != PIVOT_ALL}, key=natural_sort_key)
+    epic_keys = sorted({epic for epic, _, _ in pivot if epic != PIVOT_ALL},
+                       key=lambda k: natural_sort_key(epics[k]['summary'] if k in epics else k))
+    
+    index = {PIVOT_ALL: PIVOT_ALL}
+    for values in (epic_keys, req_statuses, test_statuses):
+        index.update((value, str(i)) for i, value in enumerate(values))
+    
+    cube = {
+        'epics': [[k, epics[k]['summary'] if k in epics else ''] for k in epic_keys],
+        'reqStatuses': req_statuses,
+        'testStatuses': test_statuses,
+        'cells': {
+            f'{index[epic]}|{index[req]}|{index[test]}': [c['stories'], c['tests'], c['links']]
+            for (epic, req, test), c in pivot.items()
+        }
+    }
+    cube_json = json.dumps(cube, separators=(',', ':')).replace('</', '<\\/')
+    
+    section = """
+        <div class="pivot-card">
+            <h3>🧮 Pivot</h3>
+            <div class="pivot-filters">
+                <label>Epic <select id="pivotEpic"></select></label>
+                <label>Requirement Status <select id="pivotReq"></select></label>
+                <label>Test Status <select id="pivotTest"></select></label>
+            </div>
+            <table class="pivot-table">
+                <thead>
+                    <tr><th>Test Status</th><th>Stories</th><th>Distinct Tests</th><th>Links</th></tr>
+                </thead>
+                <tbody id="pivotBody"></tbody>
+            </table>
+        </div>
+"""
+    
+    script = """
+        // Pivot filters: every combination is a precomputed cell of the cube
+        const pivotCube = """ + cube_json + """;
+        
+        function fillPivotSelect(id, labels) {
+            const select = document.getElementById(id);
+            select.add(new Option('All', '*'));
+            labels.forEach((label, i) => select.add(new Option(label, String(i))));
+            select.addEventListener('change', updatePivot);
+        }
+        
+        function updatePivot() {
+            const epic = document.getElementById('pivotEpic').value;
+            const req = document.getElementById('pivotReq').value;
+            const selected = document.getElementById('pivotTest').value;
+            const rows = selected === '*'
+                ? pivotCube.testStatuses.map((status, i) => [status, String(i)]).concat([['All', '*']])
+                : [[pivotCube.testStatuses[Number(selected)], selected]];
+            
+            document.getElementById('pivotBody').innerHTML = rows.map(([label, test]) => {
+                const cell = pivotCube.cells[epic + '|' + req + '|' + test] || [0, 0, 0];
+                return '<tr' + (test === '*' ? ' class="pivot-total"' : '') + '><td>' + label + '</td><td>' +
+                    cell[0] + '</td><td>' + cell[1] + '</td><td>' + cell[2] + '</td></tr>';
+            }).join('');
+        }
+        
+        fillPivotSelect('pivotEpic', pivotCube.epics.map(([key, summary]) => key + ' - ' + summary));
+        fillPivotSelect('pivotReq', pivotCube.reqStatuses);
+        fillPivotSelect('pivotTest', pivotCube.testStatuses);
+        updatePivot();
+"""
+    
+    return section, script
+
+
+def render_history_section(history, limit=50):
+    """Render the flaky/failing tests table from execution history analytics.
+    
+    Only the limit worst tests are listed, ranked by flakiness and then by
+    their current failure streak.
+    """
+    unstable = sorted(
+        ((test_key, h) for test_key, h in history.items() if h['flakiness'] > 0 or h['failure_streak'] > 0),
+        key=lambda x: (-x[1]['flakiness'], -x[1]['failure_streak'], natural_sort_key(x[0]))
+    )
+    
+    rows = ''
+    for test_key, h in unstable[:limit]:
+        rows += f"""
+                    <tr>
+                        <td><span class="test-key">{test_key}</span> {h['summary']}</td>
+                        <td>{h['flakiness'] * 100:.0f}%</td>
+                        <td>{h['window']}</td>
+                        <td>{h['failure_streak']} (max {h['max_failure_streak']})</td>
+                        <td>{h['last_pass'] or '-'}</td>
+                        <td>{h['last_fail'] or '-'}</td>
+                        <td>{', '.join(h['stories']) or '-'}</td>
+                        <td>{', '.join(h['epics']) or '-'}</td>
+                    </tr>
+"""
+    if not rows:
+        rows = '<tr><td colspan="8" class="no-tests">No flaky or failing tests in the execution history</td></tr>'
+    
+    return f"""
+        <div class="pivot-card">
+            <h3>🎲 Flaky &amp; Failing Tests ({len(unstable)} of {len(history)} executed tests)</h3>
+            <table class="pivot-table">
+                <thead>
+                    <tr><th>Test</th><th>Flakiness</th><th>Runs</th><th>Failure Streak</th><th>Last Pass</th><th>Last Fail</th><th>Stories</th><th>Epics</th></tr>
+                </thead>
+                <tbody>{rows}</tbody>
+            </table>
+        </div>
+"""
+
+
+def build_test_index(tests, stories, epics):
+    """Build the test-centric view data from the tests -> stories reverse index.
+    
+    Requirements and epics are listed once and referenced by position, so the
+    data grows with the number of links rather than repeating summaries.
+    Tests are grouped by status, most widely shared first.
+    """
+    epic_keys = list(epics)
+    epic_index = {key: i for i, key in enumerate(epic_keys)}
+    requirements = []
+    requirement_index = {}
+    groups = defaultdict(list)
+    
+    for test_key, test_data in tests.items():
+        linked = []
+        for req_key in sorted(test_data['stories'], key=natural_sort_key):
+            if req_key not in requirement_index:
+                if req_key in stories:
+                    story = stories[req_key]
+                    requirement = [req_key, story['summary'], epic_index.get(story['epic_key'], -1)]
+                else:
+                    # Test linked directly to an epic
+                    requirement = [req_key, epics[req_key]['summary'] if req_key in epics else '',
+                                   epic_index.get(req_key, -1)]
+                requirement_index[req_key] = len(requirements)
+                requirements.append(requirement)
+            linked.append(requirement_index[req_key])
+        groups[test_data['status']].append([test_key, test_data['summary'], linked])
+    
+    for group in groups.values():
+        group.sort(key=lambda t: (-len(t[2]), natural_sort_key(t[0])))
+    
+    return {
+        'epics': [[key, epics[key]['summary']] for key in epic_keys],
+        'requirements': requirements,
+        'groups': [[status, groups[status]] for status in TEST_STATUSES if status in groups],
+        'sharedThreshold': SHARED_TEST_STORIES
+    }
+
+
+def generate_html_dashboard(epics, metrics, output_file, project_name='Project', csv_filename='traceability_report.csv', pivot=None, tree=None, history=None, tests=None, stories=None):
+    """Generate an interactive HTML dashboard.
+    
+    If a pivot cube from build_pivot_cube() is given, pivot filters are added.
+    With a rolled-up requirement tree, only top-level requirements get epic
+    cards (with subtree metrics) and deeper levels are nested inside them;
+    the pivot cube and history should then be built from root_epic_stories().
+    history (from ExecutionHistory.summarize()) adds a flaky tests table.
+    With the tests reverse index (and stories) from build_traceability_model(),
+    a test-centric view is added; its data is embedded as a JSON block that
+    the page only parses when that view is first opened.
+    """
     
     from datetime import datetime
     generation_time = datetime.now().strftime('%b %d, %Y, %I:%M:%S %p')
     
+    if tree is not None:
+        epics = {key: epic_data for key, epic_data in epics.items() if tree[key]['parent'] is None}
+        metrics = {key: tree[key]['rollup'] for key in epics}
+        stories = root_epic_stories(stories or {}, tree)
+    
+    pivot_section, pivot_script = render_pivot_section(pivot, epics) if pivot else ('', '')
+    history_section = render_history_section(history) if history else ''
+    
+    if tests is not None:
+        # '<' is escaped so summaries cannot close the script block
+        test_index = json.dumps(build_test_index(tests, stories or {}, epics), separators=(',', ':'))
+        test_index = test_index.replace('<', '\\u003c')
+        view_toggle = """
+        <div class="view-toggle">
+            <button class="active" data-view="epics" onclick="showView('epics')">📁 Epics</button>
+            <button data-view="tests" onclick="showView('tests')">🧪 Tests</button>
+        </div>
+"""
+        tests_view = f"""<div class="tests-view" id="testsView" style="display: none;"></div>
+        <script type="application/json" id="testIndexData">{test_index}</script>"""
+    else:
+        view_toggle = tests_view = ''
+    
     # Sort epics by summary using natural sort
     sorted_epics = sorted(epics.items(), key=lambda x: natural_sort_key(x[1]['summary']))
     
@@ -547,6 +1100,147 @@ def generate_html_dashboard(epics, metrics, output_file, project_name='Project',
             outline: none;
             border-color: #667eea;
         }}
+        
+        .sublevel {{
+            margin-top: 10px;
+            padding-left: 20px;
+        }}
+        
+        .sublevel-header {{
+            cursor: pointer;
+            display: flex;
+            gap: 10px;
+            align-items: center;
+            font-size: 13px;
+            font-weight: 600;
+            color: #4a5568;
+            padding: 6px 0;
+        }}
+        
+        .sublevel-icon {{
+            color: #a0aec0;
+            transition: transform 0.2s;
+        }}
+        
+        .sublevel.expanded > .sublevel-header .sublevel-icon {{
+            transform: rotate(90deg);
+        }}
+        
+        .sublevel-content {{
+            display: none;
+        }}
+        
+        .sublevel.expanded > .sublevel-content {{
+            display: block;
+        }}
+        
+        .sublevel .story-item {{
+            background: #f7fafc;
+        }}
+        
+        .view-toggle {{
+            display: flex;
+            gap: 10px;
+            margin-bottom: 20px;
+        }}
+        
+        .view-toggle button {{
+            padding: 10px 20px;
+            border: none;
+            border-radius: 8px;
+            background: rgba(255,255,255,0.3);
+            color: white;
+            font-size: 15px;
+            font-weight: 600;
+            cursor: pointer;
+        }}
+        
+        .view-toggle button.active {{
+            background: white;
+            color: #667eea;
+        }}
+        
+        .tests-view {{
+            background: white;
+            border-radius: 10px;
+            box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+            overflow: hidden;
+        }}
+        
+        .test-group.expanded .epic-content {{
+            max-height: none;
+        }}
+        
+        .badge.shared {{
+            background: #fefcbf;
+            color: #744210;
+        }}
+        
+        .story-item.shared {{
+            border-left-color: #d69e2e;
+        }}
+        
+        .test-epics {{
+            font-size: 12px;
+            color: #718096;
+            padding: 4px 12px;
+        }}
+        
+        .pivot-card {{
+            background: white;
+            padding: 25px;
+            border-radius: 10px;
+            box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+            margin-bottom: 30px;
+        }}
+        
+        .pivot-card h3 {{
+            color: #2d3748;
+            margin-bottom: 20px;
+            font-size: 18px;
+        }}
+        
+        .pivot-filters {{
+            display: flex;
+            flex-wrap: wrap;
+            gap: 20px;
+            margin-bottom: 20px;
+            font-size: 14px;
+            color: #718096;
+        }}
+        
+        .pivot-filters select {{
+            margin-left: 8px;
+            padding: 6px 10px;
+            border: 2px solid #e2e8f0;
+            border-radius: 8px;
+            font-size: 14px;
+            max-width: 320px;
+        }}
+        
+        .pivot-table {{
+            width: 100%;
+            border-collapse: collapse;
+            font-size: 14px;
+        }}
+        
+        .pivot-table th, .pivot-table td {{
+            padding: 8px 12px;
+            text-align: left;
+            border-bottom: 1px solid #e2e8f0;
+        }}
+        
+        .pivot-table th {{
+            color: #718096;
+            text-transform: uppercase;
+            font-size: 12px;
+            letter-spacing: 0.5px;
+        }}
+        
+        .pivot-table tr.pivot-total td {{
+            font-weight: 600;
+            color: #2d3748;
+        }}
     </style>
 </head>
 <body>
@@ -602,7 +1296,7 @@ def generate_html_dashboard(epics, metrics, output_file, project_name='Project',
                 <canvas id="testsChart"></canvas>
             </div>
         </div>
-        
+        {pivot_section}{history_section}{view_toggle}
         <div class="search-box">
             <input type="text" id="searchInput" placeholder="🔍 Search epics, stories, or tests...">
         </div>
@@ -610,106 +1304,9 @@ def generate_html_dashboard(epics, metrics, output_file, project_name='Project',
         <div class="epics-container" id="epicsContainer">
 """
     
-    # Generate epic cards
-    for epic_key, epic_data in sorted_epics:
-        m = metrics[epic_key]
-        
-        # Determine coverage badge
-        if m['total_stories'] == 0:
-            coverage_badge = '<span class="badge no-stories">No Stories</span>'
-        else:
-            if m['coverage_percent'] >= 80:
-                coverage_class = 'coverage-high'
-            elif m['coverage_percent'] >= 50:
-                coverage_class = 'coverage-medium'
-            else:
-                coverage_class = 'coverage-low'
-            coverage_badge = f'<span class="badge {coverage_class}">{m["coverage_percent"]:.0f}%</span>'
-        
-        html += f"""
-            <div class="epic-card" data-epic-key="{epic_key}">
-                <div class="epic-header" onclick="toggleEpic(this)">
-                    <div class="epic-title">
-                        <div class="epic-key">{epic_key}</div>
-                        <div class="epic-summary">{epic_data['summary']}</div>
-                    </div>
-                    <div class="epic-stats">
-                        <span class="badge stories">{m['total_stories']} Stories</span>
-                        <span class="badge tests">{m['total_tests']} Tests</span>
-                        {coverage_badge}
-                        <span class="expand-icon">▼</span>
-                    </div>
-                </div>
-                <div class="epic-content">
-                    <div class="epic-details">
-"""
-        
-        if m['total_stories'] > 0:
-            html += '<div class="stories-list">'
-            
-            # Sort stories by summary
-            sorted_stories = sorted(
-                epic_data['stories'].items(),
-                key=lambda x: natural_sort_key(x[1]['summary'])
-            )
-            
-            for story_key, story_data in sorted_stories:
-                has_tests = len(story_data['tests']) > 0
-                coverage_class = 'covered' if has_tests else 'uncovered'
-                
-                html += f"""
-                    <div class="story-item {coverage_class}">
-                        <div class="story-header">
-                            <span class="story-key">{story_key}</span>
-                            <span class="badge {'tests' if has_tests else 'no-stories'}">{len(story_data['tests'])} Tests</span>
-                        </div>
-                        <div class="story-summary">{story_data['summary']}</div>
-"""
-                
-                if has_tests:
-                    html += '<div class="tests-list">'
-                    for test_key, test_data in story_data['tests'].items():
-                        status_lower = test_data['status'].lower().replace(' ', '')
-                        html += f"""
-                            <div class="test-item">
-                                <span class="test-key">{test_key}</span>
-                                <span class="test-summary">{test_data['summary']}</span>
-                                <span class="status-badge {status_lower}">{test_data['status']}</span>
-                            </div>
-"""
-                    html += '</div>'
-                else:
-                    html += '<div class="no-tests">No tests linked to this story</div>'
-                
-                html += '</div>'
-            
-            html += '</div>'
-        else:
-            html += '<div class="no-tests">This epic has no stories</div>'
-        
-        # Add direct tests if any
-        if '_direct_tests' in epic_data and epic_data['_direct_tests']:
-            html += '<div class="tests-list" style="margin-top: 15px;">'
-            html += '<div style="font-weight: 600; margin-bottom: 10px; color: #553c9a;">Direct Tests:</div>'
-            for test_key, test_data in epic_data['_direct_tests'].items():
-                status_lower = test_data['status'].lower().replace(' ', '')
-                html += f"""
-                    <div class="test-item">
-                        <span class="test-key">{test_key}</span>
-                        <span class="test-summary">{test_data['summary']}</span>
-                        <span class="status-badge {status_lower}">{test_data['status']}</span>
-                    </div>
-"""
-            html += '</div>'
-        
-        html += """
-                    </div>
-                </div>
-            </div>
-"""
-    
-    html += f"""
+    footer = f"""
         </div>
+        {tests_view}
     </div>
     
     <script>
@@ -767,17 +1364,98 @@ def generate_html_dashboard(epics, metrics, output_file, project_name='Project',
             }}
         }});
         
+        {pivot_script}
         // Toggle epic expansion
         function toggleEpic(header) {{
             const epicCard = header.closest('.epic-card');
             epicCard.classList.toggle('expanded');
         }}
         
+        // Toggle nested requirement levels
+        function toggleSublevel(header) {{
+            header.parentElement.classList.toggle('expanded');
+        }}
+        
+        // Test-centric view, rendered from the embedded test index on first open
+        let testIndexData = null;
+        
+        function escapeHtml(text) {{
+            return String(text).replace(/[&<>"]/g, c => ({{'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}})[c]);
+        }}
+        
+        function showView(view) {{
+            document.getElementById('epicsContainer').style.display = view === 'epics' ? 'block' : 'none';
+            document.getElementById('testsView').style.display = view === 'tests' ? 'block' : 'none';
+            document.querySelectorAll('.view-toggle button').forEach(button => {{
+                button.classList.toggle('active', button.dataset.view === view);
+            }});
+            
+            if (view === 'tests' && !testIndexData) {{
+                testIndexData = JSON.parse(document.getElementById('testIndexData').textContent);
+                renderTestsView(testIndexData);
+            }}
+        }}
+        
+        function renderTestsView(data) {{
+            const testsView = document.getElementById('testsView');
+            testsView.innerHTML = data.groups.map(([status, tests], i) => {{
+                const shared = tests.filter(t => t[2].length >= data.sharedThreshold).length;
+                return `
+                    <div class="epic-card test-group" data-group="${{i}}">
+                        <div class="epic-header" onclick="toggleTestGroup(this)">
+                            <div class="epic-title">
+                                <div class="epic-summary">
+                                    <span class="status-badge ${{status.toLowerCase().replace(' ', '')}}">${{escapeHtml(status)}}</span>
+                                </div>
+                            </div>
+                            <div class="epic-stats">
+                                <span class="badge tests">${{tests.length}} Tests</span>
+                                ${{shared ? `<span class="badge shared">${{shared}} Shared</span>` : ''}}
+                                <span class="expand-icon">▼</span>
+                            </div>
+                        </div>
+                        <div class="epic-content"><div class="epic-details"></div></div>
+                    </div>`;
+            }}).join('');
+        }}
+        
+        // A status group's tests are only turned into markup when first opened
+        function toggleTestGroup(header) {{
+            const group = header.closest('.test-group');
+            const details = group.querySelector('.epic-details');
+            if (!details.hasChildNodes()) {{
+                const data = testIndexData;
+                const tests = data.groups[Number(group.dataset.group)][1];
+                details.innerHTML = '<div class="stories-list">' + tests.map(([key, summary, links]) => {{
+                    const requirements = links.map(i => data.requirements[i]);
+                    const epics = [...new Set(requirements.map(r => r[2]).filter(i => i >= 0))].map(i => data.epics[i]);
+                    const isShared = links.length >= data.sharedThreshold;
+                    return `
+                        <div class="story-item test-entry ${{isShared ? 'shared' : 'covered'}}">
+                            <div class="story-header">
+                                <span class="story-key">${{escapeHtml(key)}}</span>
+                                <span class="badge ${{isShared ? 'shared' : 'stories'}}">${{isShared ? 'Shared by ' : ''}}${{links.length}} Stories</span>
+                            </div>
+                            <div class="story-summary">${{escapeHtml(summary)}}</div>
+                            <div class="tests-list">
+                                ${{requirements.map(([rKey, rSummary]) => `
+                                    <div class="test-item">
+                                        <span class="test-key">${{escapeHtml(rKey)}}</span>
+                                        <span class="test-summary">${{escapeHtml(rSummary)}}</span>
+                                    </div>`).join('')}}
+                                <div class="test-epics">Epics: ${{epics.map(([eKey, eSummary]) => escapeHtml(eKey + ' ' + eSummary)).join(', ') || '-'}}</div>
+                            </div>
+                        </div>`;
+                }}).join('') + '</div>';
+            }}
+            group.classList.toggle('expanded');
+        }}
+        
         // Search functionality
         const searchInput = document.getElementById('searchInput');
         searchInput.addEventListener('input', function(e) {{
             const searchTerm = e.target.value.toLowerCase();
-            const epicCards = document.querySelectorAll('.epic-card');
+            const epicCards = document.querySelectorAll('.epic-card:not(.test-group), .test-entry');
             
             epicCards.forEach(card => {{
                 const text = card.textContent.toLowerCase();
@@ -798,31 +1476,203 @@ def generate_html_dashboard(epics, metrics, output_file, project_name='Project',
     
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write(html)
+        for fragment in render_epic_fragments(sorted_epics, metrics, tree=tree):
+            f.write(fragment)
+        f.write(footer)
+
+
+def _prometheus_labels(labels):
+    """Format a label set, escaping values per the Prometheus text format."""
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels.items()
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def write_prometheus_metrics(metrics, output_file, project_name='Project', run_stats=None, max_epics=100):
+    """Write coverage and run metrics as a Prometheus/OpenMetrics textfile.
+    
+    Per-epic series are limited to the max_epics epics with the most stories;
+    the rest are folded into a single epic="_other" series so scrapes stay
+    cheap for projects with thousands of epics. The file is written to a
+    temporary file and renamed into place so collectors never read it half
+    written.
+    """
+    ranked = sorted(metrics.items(), key=lambda x: (-x[1]['total_stories'], x[0]))
+    kept = dict(ranked[:max_epics])
+    if len(ranked) > max_epics:
+        other = defaultdict(int)
+        for _, m in ranked[max_epics:]:
+            for name, value in m.items():
+                if name != 'coverage_percent':
+                    other[name] += value
+        other['coverage_percent'] = (
+            other['covered_stories'] / other['total_stories'] * 100 if other['total_stories'] > 0 else 0
+        )
+        kept['_other'] = other
+    
+    total_stories = sum(m['total_stories'] for m in metrics.values())
+    covered_stories = sum(m['covered_stories'] for m in metrics.values())
+    test_statuses = [('passed', 'passed_tests'), ('failed', 'failed_tests'),
+                     ('notrun', 'notrun_tests'), ('todo', 'todo_tests')]
+    
+    families = [
+        ('jira_traceability_epic_coverage_percent', 'Percentage of an epic\'s stories with at least one test',
+         [({'epic': key}, m['coverage_percent']) for key, m in kept.items()]),
+        ('jira_traceability_epic_stories', 'Stories in an epic',
+         [({'epic': key}, m['total_stories']) for key, m in kept.items()]),
+        ('jira_traceability_epic_covered_stories', 'Stories in an epic with at least one test',
+         [({'epic': key}, m['covered_stories']) for key, m in kept.items()]),
+        ('jira_traceability_epic_tests', 'Distinct tests linked to an epic by status',
+         [({'epic': key, 'status': status}, m[field]) for key, m in kept.items() for status, field in test_statuses]),
+        ('jira_traceability_epics', 'Epics in the report',
+         [({}, len(metrics))]),
+        ('jira_traceability_stories', 'Stories in the report',
+         [({}, total_stories)]),
+        ('jira_traceability_covered_stories', 'Stories with at least one test',
+         [({}, covered_stories)]),
+        ('jira_traceability_coverage_percent', 'Percentage of stories with at least one test',
+         [({}, (covered_stories / total_stories * 100) if total_stories > 0 else 0)]),
+        ('jira_traceability_tests', 'Tests by status, summed over epics',
+         [({'status': status}, sum(m[field] for m in metrics.values())) for status, field in test_statuses]),
+    ]
+    
+    run_stats = run_stats or {}
+    for stat, help_text in [('rows_parsed', 'Report rows parsed in the last run'),
+                            ('fetch_seconds', 'Time spent fetching from the Jira/Xray API in the last run'),
+                            ('parse_seconds', 'Time spent parsing the report in the last run'),
+                            ('render_seconds', 'Time spent rendering the dashboard in the last run'),
+                            ('last_run_timestamp_seconds', 'Unix time of the last dashboard generation')]:
+        if stat in run_stats:
+            families.append((f'jira_traceability_{stat}', help_text, [({}, run_stats[stat])]))
+    
+    lines = []
+    for name, help_text, samples in families:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} gauge')
+        for labels, value in samples:
+            labels = _prometheus_labels(dict({'project': project_name}, **labels))
+            lines.append(f'{name}{labels} {value:g}' if isinstance(value, float) else f'{name}{labels} {value}')
+    
+    output_file = Path(output_file)
+    fd, tmp_name = tempfile.mkstemp(prefix=output_file.name + '.', suffix='.tmp', dir=output_file.parent)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, output_file)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description='Generate Requirements Traceability Dashboard')
+    parser.add_argument('--csv', default='traceability_report.csv',
+                        help='Requirement Traceability Report CSV export (default: %(default)s)')
+    parser.add_argument('--output', default='dashboard.html',
+                        help='Dashboard HTML file to write (default: %(default)s)')
+    parser.add_argument('--jira-url',
+                        help='Fetch from this Jira/Xray server instead of reading the CSV; '
+                             'credentials come from JIRA_TOKEN (and JIRA_USER for basic auth)')
+    parser.add_argument('--jql', default='issuetype in (Epic, Story)',
+                        help='JQL selecting the requirements to fetch (default: %(default)s)')
+    parser.add_argument('--epic-link-field',
+                        help='Custom field holding the Epic Link, e.g. customfield_10014')
+    parser.add_argument('--cache-dir', default='.jira_cache',
+                        help='Directory for cached API responses (default: %(default)s)')
+    parser.add_argument('--full-fetch', action='store_true',
+                        help='Ignore the cached snapshot and fetch every requirement again')
+    parser.add_argument('--metrics-file',
+                        help='Prometheus textfile to write next to the dashboard (default: <output>.prom)')
+    parser.add_argument('--metrics-max-epics', type=int, default=100,
+                        help='Export per-epic series for at most this many epics (default: %(default)s)')
+    parser.add_argument('--executions',
+                        help='Directory of Xray Test Execution CSV exports to add to the run history')
+    parser.add_argument('--history-file', default='execution_history.json',
+                        help='Run history kept between runs (default: %(default)s)')
+    parser.add_argument('--history-window', type=int, default=30,
+                        help='Runs per test used for flakiness (default: %(default)s)')
+    return parser.parse_args()
 
 
 def main():
     """Main execution function."""
-    csv_file = Path('traceability_report.csv')
-    output_file = Path('dashboard.html')
+    args = parse_args()
+    csv_file = Path(args.csv)
+    output_file = Path(args.output)
     
     print("Generating Requirements Traceability Dashboard...")
-    print(f"Reading: {csv_file}")
     
-    # Parse the CSV
-    epics, stories, tests, project_name = parse_traceability_report(csv_file)
+    run_stats = {}
+    if args.jira_url:
+        from jira_fetch import fetch_traceability_rows
+        
+        print(f"Fetching: {args.jira_url} ({args.jql})")
+        source_name = args.jira_url
+        started = time.perf_counter()
+        # Fetch everything up front so the network time is not counted as parsing
+        rows = list(fetch_traceability_rows(
+            args.jira_url,
+            args.jql,
+            incremental=not args.full_fetch,
+            token=os.environ.get('JIRA_TOKEN'),
+            user=os.environ.get('JIRA_USER'),
+            cache_dir=args.cache_dir,
+            epic_link_field=args.epic_link_field
+        ))
+        run_stats['fetch_seconds'] = time.perf_counter() - started
+    else:
+        print(f"Reading: {csv_file}")
+        source_name = csv_file.name
+        rows = read_traceability_rows(csv_file)
+    
+    # Parse the rows
+    started = time.perf_counter()
+    epics, stories, tests, project_name = build_traceability_model(rows, run_stats)
+    run_stats['parse_seconds'] = time.perf_counter() - started
     
     print(f"\nParsed:")
     print(f"   - {len(epics)} Epics")
     print(f"   - {len(stories)} Stories")
     print(f"   - {len(tests)} Tests")
     
-    # Calculate metrics
-    metrics = calculate_metrics(epics)
+    # Calculate metrics; top-level requirements roll up everything nested below them
+    tree = rollup_requirement_tree(build_requirement_tree(epics, stories))
+    metrics = {key: tree[key]['rollup'] for key in epics if tree[key]['parent'] is None}
+    root_stories = root_epic_stories(stories, tree)
+    pivot = build_pivot_cube(root_stories)
+    
+    # Update the test execution history
+    history = None
+    if args.executions or Path(args.history_file).exists():
+        from execution_history import ExecutionHistory
+        
+        if args.executions and not Path(args.executions).is_dir():
+            raise FileNotFoundError(f"Test Execution directory not found: {args.executions}")
+        
+        execution_history = ExecutionHistory.load(args.history_file, args.history_window)
+        if args.executions:
+            new_files = execution_history.ingest(sorted(Path(args.executions).glob('*.csv')))
+            execution_history.save(args.history_file)
+            print(f"   - {new_files} new Test Execution files ingested")
+        history = execution_history.summarize(tests, root_stories)
     
     # Generate HTML dashboard
-    generate_html_dashboard(epics, metrics, output_file, project_name, csv_file.name)
+    started = time.perf_counter()
+    generate_html_dashboard(epics, metrics, output_file, project_name=project_name, csv_filename=source_name,
+                            pivot=pivot, tree=tree, history=history, tests=tests, stories=stories)
+    run_stats['render_seconds'] = time.perf_counter() - started
+    run_stats['last_run_timestamp_seconds'] = int(time.time())
+    
+    # Export metrics for Prometheus alerting
+    metrics_file = Path(args.metrics_file) if args.metrics_file else output_file.with_suffix('.prom')
+    write_prometheus_metrics(metrics, metrics_file, project_name, run_stats, args.metrics_max_epics)
     
     print(f"\nDashboard generated: {output_file}")
+    print(f"Metrics exported: {metrics_file}")
     print(f"\nOpen {output_file} in your browser to view the dashboard.")
 
 
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Fetch Requirements Traceability data straight from the Jira/Xray REST API.
+Produces rows shaped like the Requirement Traceability Report CSV, so they feed
+build_traceability_model() in generate_dashboard.py unchanged.
+"""
+
+import asyncio
+import base64
+import hashlib
+import http.client
+import json
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+SEARCH_FIELDS = ['summary', 'status', 'project', 'parent', 'issuelinks']
+
+SNAPSHOT_FILE = '_issues_snapshot.json'
+
+ORDER_BY_RE = re.compile(r'\s*\bORDER\s+BY\b.*$', re.IGNORECASE | re.DOTALL)
+UPDATED_SINCE_RE = re.compile(r'\bupdated >= -\d+m\b')
+
+
+class JiraFetchError(Exception):
+    """Raised when the Jira/Xray API cannot be read."""
+
+
+def updated_since_jql(jql, minutes):
+    """Restrict a JQL query to issues updated in the last minutes.
+
+    An ORDER BY clause is moved behind the added condition so the result
+    stays valid JQL.
+    """
+    order_by = ORDER_BY_RE.search(jql)
+    where = jql[:order_by.start()] if order_by else jql
+    condition = f'updated >= -{minutes}m'
+    if where.strip():
+        condition = f'({where.strip()}) AND {condition}'
+    if order_by:
+        condition += ' ' + order_by.group(0).strip()
+    return condition
+
+
+class ConnectionPool:
+    """Bounded pool of keep-alive HTTP connections to one Jira host.
+
+    http.client is blocking, so requests run on a thread pool sized like the
+    connection pool; idle connections are reused instead of reconnecting.
+    """
+
+    def __init__(self, base_url, size=8, timeout=30):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or 'https'
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self._idle = []
+        self._slots = asyncio.Semaphore(size)
+        self._executor = ThreadPoolExecutor(max_workers=size)
+
+    def _connect(self):
+        if self.scheme == 'https':
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _send(self, conn, path, headers):
+        conn.request('GET', self.prefix + path, headers=headers)
+        response = conn.getresponse()
+        body = response.read()
+        response_headers = {name.lower(): value for name, value in response.getheaders()}
+        return response.status, response_headers, body
+
+    async def get(self, path, headers):
+        """Send a GET request; returns (status, headers, body)."""
+        async with self._slots:
+            conn = self._idle.pop() if self._idle else self._connect()
+            loop = asyncio.get_running_loop()
+            try:
+                result = await loop.run_in_executor(self._executor, self._send, conn, path, headers)
+            except BaseException:
+                conn.close()
+                raise
+            if result[1].get('connection', '').lower() == 'close':
+                conn.close()
+            else:
+                self._idle.append(conn)
+            return result
+
+    def close(self):
+        for conn in self._idle:
+            conn.close()
+        self._idle = []
+        self._executor.shutdown(wait=False)
+
+
+class ResponseCache:
+    """On-disk cache of GET responses keyed by request path.
+
+    Entries keep the ETag/Last-Modified validators so unchanged resources are
+    revalidated with a cheap 304. The same files double as recorded responses
+    for serve_recorded().
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _entry_file(self, path):
+        return self.cache_dir / (hashlib.sha1(path.encode('utf-8')).hexdigest() + '.json')
+
+    def get(self, path):
+        entry_file = self._entry_file(path)
+        if not entry_file.exists():
+            return None
+        with open(entry_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def put(self, path, headers, body):
+        entry = {
+            'path': path,
+            'etag': headers.get('etag'),
+            'last_modified': headers.get('last-modified'),
+            'body': body.decode('utf-8')
+        }
+        with open(self._entry_file(path), 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+
+
+class XrayFetcher:
+    """Async reader for requirements, test links and test run statuses."""
+
+    def __init__(self, base_url, token=None, user=None, pool_size=8, page_size=100,
+                 retries=4, backoff=0.5, cache_dir=None, test_link_type='Test',
+                 epic_link_field=None):
+        self.base_url = base_url
+        self.pool_size = pool_size
+        self.page_size = page_size
+        self.retries = retries
+        self.backoff = backoff
+        self.test_link_type = test_link_type
+        self.epic_link_field = epic_link_field
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+        self.pool = None
+        self.headers = {'Accept': 'application/json'}
+        if token and user:
+            credentials = base64.b64encode(f'{user}:{token}'.encode('utf-8')).decode('ascii')
+            self.headers['Authorization'] = f'Basic {credentials}'
+        elif token:
+            self.headers['Authorization'] = f'Bearer {token}'
+
+    async def get_json(self, path, params=None, use_cache=True):
+        """GET a JSON resource, retrying transient failures with backoff.
+
+        With use_cache=False the response is neither revalidated from nor
+        written to the cache (for one-off queries that are never repeated).
+        """
+        if params:
+            path = f'{path}?{urlencode(params)}'
+
+        cache = self.cache if use_cache else None
+        headers = dict(self.headers)
+        cached = cache.get(path) if cache else None
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            try:
+                status, response_headers, body = await self.pool.get(path, headers)
+            except (OSError, http.client.HTTPException) as e:
+                error = f'GET {path} failed: {e}'
+            else:
+                if status == 304 and cached:
+                    return json.loads(cached['body'])
+                if 200 <= status < 300:
+                    if cache:
+                        cache.put(path, response_headers, body)
+                    return json.loads(body.decode('utf-8'))
+                error = f'GET {path} returned HTTP {status}'
+                if status not in RETRY_STATUSES:
+                    raise JiraFetchError(error)
+                retry_after = response_headers.get('retry-after')
+
+            if attempt == self.retries:
+                raise JiraFetchError(error)
+            if retry_after and retry_after.isdigit():
+                delay = int(retry_after)
+            else:
+                delay = self.backoff * (2 ** attempt) * (1 + random.random())
+            await asyncio.sleep(delay)
+
+    async def search(self, jql, fields, use_cache=True):
+        """Run a JQL search, fetching all pages after the first concurrently."""
+        def page_params(start_at):
+            return {
+                'jql': jql,
+                'fields': ','.join(fields),
+                'startAt': start_at,
+                'maxResults': self.page_size
+            }
+
+        first = await self.get_json('/rest/api/2/search', page_params(0), use_cache)
+        issues = list(first.get('issues', []))
+        page_size = first.get('maxResults') or self.page_size
+        total = first.get('total', len(issues))
+
+        pages = await asyncio.gather(*[
+            self.get_json('/rest/api/2/search', page_params(start_at), use_cache)
+            for start_at in range(len(issues), total, page_size)
+        ])
+        for page in pages:
+            issues.extend(page.get('issues', []))
+        return issues
+
+    async def search_since_snapshot(self, jql, fields, incremental=True):
+        """Run a JQL search, only fetching issues updated since the last run.
+
+        The previous result is kept in the cache directory; later runs add
+        `updated >= -Nm` to the query and merge the changes into it. The delta
+        query differs on every run, so its responses are not cached. Issues
+        deleted in Jira stay in the snapshot until a full fetch.
+        """
+        snapshot_file = self.cache.cache_dir / SNAPSHOT_FILE if self.cache else None
+        snapshot = None
+        if incremental and snapshot_file and snapshot_file.exists():
+            with open(snapshot_file, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            if snapshot.get('jql') != jql or snapshot.get('fields') != fields:
+                snapshot = None
+
+        started = time.time()
+        if snapshot:
+            # Relative JQL dates avoid any server/client timezone mismatch
+            minutes = int((started - snapshot['synced_at']) // 60) + 5
+            changed = await self.search(updated_since_jql(jql, minutes), fields, use_cache=False)
+            issues = snapshot['issues']
+            for issue in changed:
+                issues[issue['key']] = issue
+        else:
+            issues = {issue['key']: issue for issue in await self.search(jql, fields)}
+
+        if snapshot_file:
+            with open(snapshot_file, 'w', encoding='utf-8') as f:
+                json.dump({'jql': jql, 'fields': fields, 'synced_at': started, 'issues': issues}, f)
+        return list(issues.values())
+
+    async def latest_test_status(self, test_key):
+        """Return the status of the most recent Xray test run of a test."""
+        runs = await self.get_json('/rest/raven/1.0/testruns', {'testKey': test_key})
+        if not runs:
+            return 'TODO'
+        latest = max(runs, key=lambda run: run.get('finishedOn') or run.get('startedOn') or '')
+        return latest.get('status') or 'TODO'
+
+    def _parent(self, fields):
+        if fields.get('parent'):
+            return fields['parent']['key'], fields['parent'].get('fields', {}).get('summary', '')
+        if self.epic_link_field and fields.get(self.epic_link_field):
+            return fields[self.epic_link_field], ''
+        return '', ''
+
+    def _linked_tests(self, fields):
+        for link in fields.get('issuelinks') or []:
+            if link.get('type', {}).get('name') == self.test_link_type and 'inwardIssue' in link:
+                yield link['inwardIssue']
+
+    async def fetch_rows(self, jql, incremental=True):
+        """Fetch requirements, their test links and test run statuses.
+
+        Returns rows keyed by the traceability report's CSV column names.
+        """
+        fields = list(SEARCH_FIELDS)
+        if self.epic_link_field:
+            fields.append(self.epic_link_field)
+
+        self.pool = ConnectionPool(self.base_url, self.pool_size)
+        try:
+            issues = await self.search_since_snapshot(jql, fields, incremental)
+            summaries = {issue['key']: issue['fields'].get('summary', '') for issue in issues}
+
+            test_keys = sorted({test['key'] for issue in issues
+                                for test in self._linked_tests(issue['fields'])})
+            statuses = await asyncio.gather(*[self.latest_test_status(key) for key in test_keys])
+            test_statuses = dict(zip(test_keys, statuses))
+        finally:
+            self.pool.close()
+
+        rows = []
+        for issue in issues:
+            fields = issue['fields']
+            parent_key, parent_summary = self._parent(fields)
+            base_row = {
+                'Project name': (fields.get('project') or {}).get('name', ''),
+                'Parent Requirement Key': parent_key,
+                'Parent Requirement Summary': parent_summary or summaries.get(parent_key, ''),
+                'Requirement Key': issue['key'],
+                'Requirement Summary': fields.get('summary', ''),
+                'Requirement Status': (fields.get('status') or {}).get('name', ''),
+                'Test Key': '',
+                'Test Summary': '',
+                'Test Status': ''
+            }
+            linked_tests = list(self._linked_tests(fields))
+            if not linked_tests:
+                rows.append(base_row)
+            for test in linked_tests:
+                row = dict(base_row)
+                row['Test Key'] = test['key']
+                row['Test Summary'] = test.get('fields', {}).get('summary', '')
+                row['Test Status'] = test_statuses[test['key']]
+                rows.append(row)
+        return rows
+
+
+def fetch_traceability_rows(base_url, jql, incremental=True, **options):
+    """Yield traceability report rows fetched from the Jira/Xray REST API."""
+    fetcher = XrayFetcher(base_url, **options)
+    for row in asyncio.run(fetcher.fetch_rows(jql, incremental)):
+        yield row
+
+
+def serve_recorded(cache_dir, host='127.0.0.1', port=0):
+    """Serve cached responses as a mock Jira/Xray API for offline runs.
+
+    Returns a started ThreadingHTTPServer; point XrayFetcher at
+    http://host:server.server_port to replay a previous fetch. Incremental
+    "updated since" searches are answered with no changes, since recorded
+    data never changes, so incremental runs replay as well.
+    """
+    cache = ResponseCache(cache_dir)
+
+    class RecordedHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            entry = cache.get(self.path)
+            if entry is None and self._is_updated_since_search():
+                entry = {'body': json.dumps({'startAt': 0, 'maxResults': 0, 'total': 0, 'issues': []})}
+            if entry is None:
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+            body = entry['body'].encode('utf-8')
+            etag = entry.get('etag') or '"%s"' % hashlib.sha1(body).hexdigest()
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _is_updated_since_search(self):
+            parts = urlsplit(self.path)
+            jql = parse_qs(parts.query).get('jql', [''])[0]
+            return parts.path.endswith('/rest/api/2/search') and bool(UPDATED_SINCE_RE.search(jql))
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), RecordedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    import sys
+
+    recordings = sys.argv[1] if len(sys.argv) > 1 else '.jira_cache'
+    mock = serve_recorded(recordings, port=int(sys.argv[2]) if len(sys.argv) > 2 else 8080)
+    print(f"Serving recorded Jira/Xray responses from {recordings} "
+          f"on http://127.0.0.1:{mock.server_port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        mock.shutdown()
@@ -0,0 +1,112 @@
+"""
+Tests for execution_history: incremental ingestion of Xray Test Execution
+exports and the per-test analytics derived from them.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from execution_history import FAIL, PASS, ExecutionHistory, parse_run_time  # noqa: E402
+
+
+class IngestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_execution(self, name, runs, mtime):
+        path = self.dir / name
+        lines = ['Test Key;Status;Finished On'] + [';'.join(run) for run in runs]
+        path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_reexported_file_only_adds_new_runs(self):
+        history = ExecutionHistory()
+        path = self.write_execution('a.csv', [('T-1', 'PASS', '2024-01-01 10:00')], 1000)
+        self.assertEqual(history.ingest([path]), 1)
+        self.assertEqual(history.ingest([path]), 0)
+
+        self.write_execution('a.csv', [('T-1', 'PASS', '2024-01-01 10:00'), ('T-1', 'FAIL', '2024-01-02 10:00')], 2000)
+        self.assertEqual(history.ingest([path]), 1)
+        self.assertEqual(history.stats['T-1']['runs'], 2)
+        self.assertEqual(list(history.outcomes['T-1']), [PASS, FAIL])
+
+    def test_reexported_failures_are_not_counted_twice(self):
+        history = ExecutionHistory()
+        runs = [('T-1', 'FAIL', f'2024-01-0{day} 10:00') for day in range(1, 4)]
+        path = self.write_execution('a.csv', runs[:2], 1000)
+        history.ingest([path])
+        self.write_execution('a.csv', runs, 2000)
+        history.ingest([path])
+
+        stats = history.stats['T-1']
+        self.assertEqual((stats['runs'], stats['failure_streak'], stats['max_failure_streak']), (3, 3, 3))
+        self.assertEqual(list(history.outcomes['T-1']), [FAIL] * 3)
+
+    def test_same_time_runs_of_different_executions_are_kept(self):
+        history = ExecutionHistory()
+        history.ingest([self.write_execution('a.csv', [('T-1', 'PASS', '2024-01-01 10:00')], 1000),
+                        self.write_execution('b.csv', [('T-1', 'FAIL', '2024-01-01 10:00')], 1000)])
+
+        self.assertEqual(history.stats['T-1']['runs'], 2)
+
+    def test_runs_are_ordered_by_run_time_not_file_time(self):
+        history = ExecutionHistory()
+        newer = self.write_execution('newer.csv', [('T-1', 'FAIL', '2024-03-01T10:00:00Z')], 1000)
+        older = self.write_execution('older.csv', [('T-1', 'PASS', '01/Feb/24 10:00 AM')], 2000)
+        history.ingest([newer, older])
+
+        self.assertEqual(list(history.outcomes['T-1']), [PASS, FAIL])
+        self.assertEqual(history.stats['T-1']['failure_streak'], 1)
+        self.assertEqual(history.stats['T-1']['last_fail'], '2024-03-01T10:00:00')
+
+    def test_older_runs_in_a_later_batch_are_skipped(self):
+        history = ExecutionHistory()
+        history.ingest([self.write_execution('b.csv', [('T-1', 'PASS', '2024-05-01 10:00'),
+                                                       ('T-1', 'FAIL', '2024-05-02 10:00')], 1000)])
+        history.ingest([self.write_execution('c.csv', [('T-1', 'PASS', '2024-04-01 10:00')], 2000)])
+
+        stats = history.stats['T-1']
+        self.assertEqual((stats['runs'], stats['failure_streak']), (2, 1))
+        self.assertEqual(stats['last_pass'], '2024-05-01T10:00:00')
+        self.assertEqual(list(history.outcomes['T-1']), [PASS, FAIL])
+
+    def test_file_time_fallback_is_utc(self):
+        history = ExecutionHistory()
+        history.ingest([self.write_execution('d.csv', [('T-1', 'PASS', 'unknown')], 86400)])
+
+        self.assertEqual(history.stats['T-1']['last_pass'], '1970-01-02T00:00:00')
+
+    def test_state_round_trip(self):
+        history = ExecutionHistory(window=2)
+        runs = [('T-1', status, f'2024-01-0{day} 10:00') for day, status in enumerate(['PASS', 'FAIL', 'FAIL'], 1)]
+        path = self.write_execution('d.csv', runs, 1000)
+        history.ingest([path])
+        history.save(self.dir / 'history.json')
+
+        loaded = ExecutionHistory.load(self.dir / 'history.json', window=2)
+        self.assertEqual(list(loaded.outcomes['T-1']), [FAIL, FAIL])
+        self.assertEqual(loaded.ingest([path]), 0)
+
+
+class ParseRunTimeTest(unittest.TestCase):
+
+    def test_formats(self):
+        self.assertEqual(parse_run_time('2024-02-01T11:00:00+01:00').isoformat(), '2024-02-01T10:00:00')
+        self.assertEqual(parse_run_time('01/Feb/24 2:30 PM').isoformat(), '2024-02-01T14:30:00')
+        self.assertIsNone(parse_run_time('yesterday'))
+        self.assertIsNone(parse_run_time(''))
+
+
+if __name__ == '__main__':
+    unittest.main()
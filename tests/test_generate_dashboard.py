@@ -0,0 +1,268 @@
+"""
+Tests for the report model, rollups and exports in generate_dashboard.
+"""
+
+import json
+import os
+import re
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from generate_dashboard import (  # noqa: E402
+    NO_TESTS, PIVOT_ALL, _prometheus_labels, build_pivot_cube, build_requirement_tree, build_test_index,
+    build_traceability_model, calculate_metrics, generate_html_dashboard, render_epic_fragments,
+    rollup_requirement_tree, root_epic_stories, write_prometheus_metrics
+)
+
+
+def report_rows(links):
+    """Report rows from (parent key, requirement key, requirement status, test key, test status)."""
+    return [{
+        'Project name': 'Proj',
+        'Parent Requirement Key': parent_key,
+        'Parent Requirement Summary': f'Summary {parent_key}',
+        'Requirement Key': req_key,
+        'Requirement Summary': f'Summary {req_key}',
+        'Requirement Status': req_status,
+        'Test Key': test_key,
+        'Test Summary': f'Summary {test_key}',
+        'Test Status': test_status
+    } for parent_key, req_key, req_status, test_key, test_status in links]
+
+
+def epic_metrics(total, covered, passed=0, failed=0):
+    return {
+        'total_stories': total,
+        'covered_stories': covered,
+        'uncovered_stories': total - covered,
+        'coverage_percent': (covered / total * 100) if total > 0 else 0,
+        'total_tests': passed + failed,
+        'passed_tests': passed,
+        'failed_tests': failed,
+        'notrun_tests': 0,
+        'todo_tests': 0
+    }
+
+
+class PrometheusMetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.prom_file = Path(self.tmp.name) / 'dashboard.prom'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def samples(self):
+        samples = {}
+        for line in self.prom_file.read_text(encoding='utf-8').splitlines():
+            if not line.startswith('#'):
+                series, value = line.rsplit(' ', 1)
+                samples[series] = value
+        return samples
+
+    def test_small_epics_fold_into_other(self):
+        metrics = {'E-1': epic_metrics(10, 5, passed=3), 'E-2': epic_metrics(4, 4, failed=2),
+                   'E-3': epic_metrics(2, 0)}
+        write_prometheus_metrics(metrics, self.prom_file, 'Proj', {'rows_parsed': 16}, max_epics=1)
+        samples = self.samples()
+
+        self.assertEqual(samples['jira_traceability_epic_stories{project="Proj",epic="E-1"}'], '10')
+        self.assertEqual(samples['jira_traceability_epic_stories{project="Proj",epic="_other"}'], '6')
+        self.assertEqual(samples['jira_traceability_epic_coverage_percent{project="Proj",epic="_other"}'], '66.6667')
+        self.assertEqual(samples['jira_traceability_epic_tests{project="Proj",epic="_other",status="failed"}'], '2')
+        self.assertNotIn('jira_traceability_epic_stories{project="Proj",epic="E-2"}', samples)
+        # Report totals still cover every epic
+        self.assertEqual(samples['jira_traceability_epics{project="Proj"}'], '3')
+        self.assertEqual(samples['jira_traceability_stories{project="Proj"}'], '16')
+        self.assertEqual(samples['jira_traceability_rows_parsed{project="Proj"}'], '16')
+
+    def test_label_values_are_escaped(self):
+        self.assertEqual(_prometheus_labels({'project': 'A "B"\\C\nD'}), '{project="A \\"B\\"\\\\C\\nD"}')
+
+    def test_failed_write_keeps_previous_file(self):
+        self.prom_file.write_text('previous\n', encoding='utf-8')
+        with mock.patch('generate_dashboard.os.replace', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                write_prometheus_metrics({'E-1': epic_metrics(1, 1)}, self.prom_file)
+
+        self.assertEqual(self.prom_file.read_text(encoding='utf-8'), 'previous\n')
+        self.assertEqual(os.listdir(self.tmp.name), ['dashboard.prom'])
+
+
+class PivotCubeTest(unittest.TestCase):
+
+    def setUp(self):
+        _, stories, _, _ = build_traceability_model(report_rows([
+            ('E-1', 'S-1', 'In Progress', 'T-1', 'PASS'),
+            ('E-1', 'S-1', 'In Progress', 'T-2', 'FAIL'),
+            ('E-1', 'S-2', 'Done', '', ''),
+            ('E-2', 'S-3', 'In Progress', 'T-1', 'PASS'),
+        ]))
+        self.cube = build_pivot_cube(stories)
+
+    def cell(self, epic, req_status, test_status):
+        return self.cube[(epic, req_status, test_status)]
+
+    def test_cells_count_distinct_stories_and_tests(self):
+        self.assertEqual(self.cell('E-1', 'In Progress', 'PASSED'), {'stories': 1, 'tests': 1, 'links': 1})
+        self.assertEqual(self.cell('E-1', PIVOT_ALL, PIVOT_ALL), {'stories': 2, 'tests': 2, 'links': 2})
+        # T-1 covers stories in both epics but is one distinct test
+        self.assertEqual(self.cell(PIVOT_ALL, 'In Progress', PIVOT_ALL), {'stories': 2, 'tests': 2, 'links': 3})
+        self.assertEqual(self.cell(PIVOT_ALL, PIVOT_ALL, PIVOT_ALL), {'stories': 3, 'tests': 2, 'links': 3})
+
+    def test_stories_without_tests(self):
+        self.assertEqual(self.cell(PIVOT_ALL, PIVOT_ALL, NO_TESTS), {'stories': 1, 'tests': 0, 'links': 0})
+        self.assertEqual(self.cell('E-1', 'Done', PIVOT_ALL), {'stories': 1, 'tests': 0, 'links': 0})
+
+    def test_empty_combinations_are_left_out(self):
+        self.assertNotIn(('E-2', 'Done', PIVOT_ALL), self.cube)
+        self.assertNotIn(('E-2', PIVOT_ALL, 'FAILED'), self.cube)
+
+
+def requirement_tree(links):
+    epics, stories, _, _ = build_traceability_model(report_rows(links))
+    return epics, stories, rollup_requirement_tree(build_requirement_tree(epics, stories))
+
+
+class RequirementTreeTest(unittest.TestCase):
+
+    def test_two_level_rollups_match_calculate_metrics(self):
+        epics, _, tree = requirement_tree([
+            ('E-1', 'S-1', 'Done', 'T-1', 'PASS'),
+            ('E-1', 'S-1', 'Done', 'T-2', 'FAIL'),
+            ('E-1', 'S-2', 'Done', 'T-2', 'EXECUTING'),
+            ('E-1', 'S-3', 'To Do', '', ''),
+            ('E-2', 'S-4', 'Done', 'T-1', 'NOT RUN'),
+            ('', 'E-2', 'Done', 'T-3', 'FAIL'),
+            ('E-3', 'S-5', 'Done', '', ''),
+        ])
+        roots = [key for key, node in tree.items() if node['parent'] is None]
+
+        self.assertEqual(sorted(roots), ['E-1', 'E-2', 'E-3'])
+        metrics = calculate_metrics(epics)
+        for key in roots:
+            self.assertEqual(tree[key]['rollup'], metrics[key], key)
+
+    def test_four_level_rollup(self):
+        _, stories, tree = requirement_tree([
+            ('I-1', 'E-1', 'Done', '', ''),
+            ('I-1', 'E-2', 'Done', 'T-4', 'PASS'),
+            ('E-1', 'S-1', 'Done', 'T-1', 'PASS'),
+            ('E-1', 'S-2', 'Done', '', ''),
+            ('S-1', 'ST-1', 'Done', 'T-2', 'FAIL'),
+            ('S-1', 'ST-2', 'Done', 'T-1', 'PASS'),
+            ('S-2', 'ST-3', 'Done', 'T-3', 'TODO'),
+        ])
+
+        self.assertEqual(tree['I-1']['children'], ['E-1', 'E-2'])
+        self.assertEqual(tree['ST-1']['parent'], 'S-1')
+        rollup = tree['I-1']['rollup']
+        self.assertEqual((rollup['total_stories'], rollup['covered_stories']), (7, 5))
+        self.assertEqual((rollup['total_tests'], rollup['passed_tests'], rollup['failed_tests'],
+                          rollup['todo_tests']), (4, 2, 1, 1))
+        self.assertEqual((tree['S-1']['rollup']['total_stories'], tree['S-1']['rollup']['total_tests']), (2, 2))
+        self.assertEqual(tree['ST-1']['rollup']['total_stories'], 0)
+        self.assertEqual({key: story['epic_key'] for key, story in root_epic_stories(stories, tree).items()},
+                         dict.fromkeys(['E-1', 'E-2', 'S-1', 'S-2', 'ST-1', 'ST-2', 'ST-3'], 'I-1'))
+
+    def test_self_parent_becomes_root(self):
+        _, _, tree = requirement_tree([('S-1', 'S-1', 'Done', 'T-1', 'PASS')])
+
+        self.assertEqual((tree['S-1']['parent'], tree['S-1']['children']), (None, []))
+        self.assertEqual(tree['S-1']['rollup']['total_stories'], 0)
+        self.assertEqual(tree['S-1']['rollup']['total_tests'], 1)
+
+    def test_parent_cycle_is_broken(self):
+        _, _, tree = requirement_tree([
+            ('A', 'B', 'Done', 'T-1', 'PASS'),
+            ('B', 'C', 'Done', '', ''),
+            ('C', 'A', 'Done', 'T-2', 'FAIL'),
+        ])
+        roots = [key for key, node in tree.items() if node['parent'] is None]
+
+        self.assertEqual(len(roots), 1)
+        rollup = tree[roots[0]]['rollup']
+        self.assertEqual((rollup['total_stories'], rollup['total_tests']), (2, 2))
+
+    def test_test_linked_at_two_levels_counts_once_under_first_status(self):
+        epics, _, tree = requirement_tree([
+            ('E-1', 'S-1', 'Done', 'T-1', 'PASS'),
+            ('', 'E-1', 'Done', 'T-1', 'FAIL'),
+            ('S-1', 'ST-1', 'Done', 'T-2', 'FAIL'),
+            ('E-1', 'S-1', 'Done', 'T-2', 'PASS'),
+        ])
+
+        # Links walk children first, so the sub-task's FAIL wins for T-2
+        # and the story's PASS beats the direct epic link for T-1
+        rollup = tree['E-1']['rollup']
+        self.assertEqual((rollup['total_tests'], rollup['passed_tests'], rollup['failed_tests']), (2, 1, 1))
+        self.assertEqual(tree['S-1']['rollup']['failed_tests'], 1)
+
+    def test_story_under_two_epics_is_listed_once(self):
+        epics, _, tree = requirement_tree([
+            ('E-1', 'S-1', 'Done', 'T-1', 'PASS'),
+            ('E-1', 'S-2', 'Done', '', ''),
+            ('E-2', 'S-1', 'Done', 'T-1', 'PASS'),
+            ('E-2', 'S-3', 'Done', 'T-2', 'PASS'),
+        ])
+        metrics = {key: tree[key]['rollup'] for key in epics}
+        cards = dict(zip(sorted(epics), render_epic_fragments(sorted(epics.items()), metrics, tree=tree)))
+
+        self.assertEqual(metrics['E-2']['total_stories'], 1)
+        self.assertEqual(cards['E-1'].count('class="story-item'), 2)
+        self.assertEqual(cards['E-2'].count('class="story-item'), 1)
+        self.assertNotIn('S-1', cards['E-2'])
+
+
+class TestIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.epics, self.stories, self.tests, _ = build_traceability_model(report_rows([
+            ('E-1', 'S-1', 'Done', 'T-1', 'PASS'),
+            ('E-1', 'S-2', 'Done', 'T-1', 'PASS'),
+            ('E-2', 'S-10', 'Done', 'T-1', 'PASS'),
+            ('E-2', 'S-3', 'Done', 'T-2', 'PASS'),
+            ('E-1', 'S-2', 'Done', 'T-3', 'FAIL'),
+            ('', 'E-2', 'Done', 'T-4', 'FAIL'),
+        ]))
+
+    def test_tests_reference_requirements_and_epics_by_position(self):
+        index = build_test_index(self.tests, self.stories, self.epics)
+
+        self.assertEqual(index['epics'], [['E-1', 'Summary E-1'], ['E-2', 'Summary E-2']])
+        self.assertEqual([status for status, _ in index['groups']], ['PASSED', 'FAILED'])
+        passed = dict((key, links) for key, _, links in index['groups'][0][1])
+        self.assertEqual([index['requirements'][i][0] for i in passed['T-1']], ['S-1', 'S-2', 'S-10'])
+        self.assertEqual([index['requirements'][i][2] for i in passed['T-1']], [0, 0, 1])
+        # A test linked straight to an epic points at that epic
+        failed = dict((key, links) for key, _, links in index['groups'][1][1])
+        self.assertEqual(index['requirements'][failed['T-4'][0]], ['E-2', 'Summary E-2', 1])
+        self.assertEqual(len(index['requirements']), 5)
+
+    def test_shared_tests_sort_first(self):
+        index = build_test_index(self.tests, self.stories, self.epics)
+
+        self.assertEqual([test[0] for test in index['groups'][0][1]], ['T-1', 'T-2'])
+        self.assertEqual([test[0] for test in index['groups'][1][1]], ['T-3', 'T-4'])
+
+    def test_index_is_embedded_in_the_dashboard(self):
+        self.tests['T-2']['summary'] = 'Ends </script> early'
+        with tempfile.TemporaryDirectory() as tmp:
+            output_file = Path(tmp) / 'dashboard.html'
+            generate_html_dashboard(self.epics, calculate_metrics(self.epics), output_file,
+                                    tests=self.tests, stories=self.stories)
+            html = output_file.read_text(encoding='utf-8')
+            self.assertEqual(os.listdir(tmp), ['dashboard.html'])
+
+        block = re.search(r'<script type="application/json" id="testIndexData">(.*?)</script>', html, re.S)
+        self.assertEqual(json.loads(block.group(1)), build_test_index(self.tests, self.stories, self.epics))
+
+
+if __name__ == '__main__':
+    unittest.main()
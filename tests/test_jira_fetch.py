@@ -0,0 +1,199 @@
+"""
+Offline tests for jira_fetch: recorded Jira/Xray responses are replayed by
+serve_recorded() and read back through XrayFetcher.
+"""
+
+import asyncio
+import json
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlencode
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from generate_dashboard import build_traceability_model, calculate_metrics  # noqa: E402
+from jira_fetch import (  # noqa: E402
+    SEARCH_FIELDS, ConnectionPool, JiraFetchError, ResponseCache, XrayFetcher,
+    fetch_traceability_rows, serve_recorded, updated_since_jql
+)
+
+
+JQL = 'issuetype in (Epic, Story)'
+PAGE_SIZE = 3
+
+
+def search_path(start_at):
+    params = {'jql': JQL, 'fields': ','.join(SEARCH_FIELDS), 'startAt': start_at, 'maxResults': PAGE_SIZE}
+    return '/rest/api/2/search?' + urlencode(params)
+
+
+def run_history_path(test_key):
+    return '/rest/raven/1.0/testruns?' + urlencode({'testKey': test_key})
+
+
+def record_responses(recordings):
+    """Record a 3-page search for 7 requirements and the runs of 3 tests."""
+    cache = ResponseCache(recordings)
+    issues = []
+    for i in range(7):
+        links = []
+        if i % 2:
+            test_key = f'P-T{i % 3}'
+            links.append({'type': {'name': 'Test'},
+                          'inwardIssue': {'key': test_key, 'fields': {'summary': f'Test {i % 3}'}}})
+        issues.append({'key': f'P-{i}', 'fields': {
+            'summary': f'Story {i}',
+            'status': {'name': 'In Progress'},
+            'project': {'name': 'Proj'},
+            'parent': {'key': 'P-E1', 'fields': {'summary': 'Epic one'}} if i else None,
+            'issuelinks': links
+        }})
+
+    for start_at in range(0, len(issues), PAGE_SIZE):
+        page = {'startAt': start_at, 'maxResults': PAGE_SIZE, 'total': len(issues),
+                'issues': issues[start_at:start_at + PAGE_SIZE]}
+        cache.put(search_path(start_at), {'etag': f'"page-{start_at}"'}, json.dumps(page).encode('utf-8'))
+
+    for test_key, status in [('P-T0', 'PASS'), ('P-T1', 'FAIL'), ('P-T2', 'EXECUTING')]:
+        runs = [{'status': 'TODO', 'finishedOn': '2024-01-01T10:00:00'},
+                {'status': status, 'finishedOn': '2024-02-01T10:00:00'}]
+        cache.put(run_history_path(test_key), {'etag': f'"{test_key}"'}, json.dumps(runs).encode('utf-8'))
+    return cache
+
+
+class RecordedReplayTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.recordings = Path(self.tmp.name) / 'recordings'
+        self.cache_dir = Path(self.tmp.name) / 'cache'
+        self.recorded = record_responses(self.recordings)
+        self.server = serve_recorded(self.recordings)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def fetch(self, incremental=False):
+        return list(fetch_traceability_rows(self.url, JQL, incremental=incremental, cache_dir=self.cache_dir,
+                                            page_size=PAGE_SIZE, pool_size=2, backoff=0))
+
+    def test_full_fetch_builds_traceability_model(self):
+        rows = self.fetch()
+
+        self.assertEqual([row['Requirement Key'] for row in rows], [f'P-{i}' for i in range(7)])
+        epics, stories, tests, project_name = build_traceability_model(rows)
+        self.assertEqual(project_name, 'Proj')
+        self.assertEqual(set(tests), {'P-T0', 'P-T1', 'P-T2'})
+        metrics = calculate_metrics(epics)['P-E1']
+        self.assertEqual(metrics['total_stories'], 6)
+        self.assertEqual(metrics['covered_stories'], 3)
+        self.assertEqual((metrics['passed_tests'], metrics['failed_tests'], metrics['todo_tests']), (1, 1, 1))
+
+    def test_unchanged_responses_are_revalidated_with_etag(self):
+        first = self.fetch()
+
+        # Same ETag, different body: a 304 must serve the client's cached copy
+        entry = self.recorded.get(run_history_path('P-T1'))
+        self.recorded.put(run_history_path('P-T1'), {'etag': entry['etag']},
+                          json.dumps([{'status': 'PASS', 'finishedOn': '2024-03-01'}]).encode('utf-8'))
+        self.assertEqual(self.fetch(), first)
+
+        # A changed ETag replaces the cached copy
+        self.recorded.put(run_history_path('P-T1'), {'etag': '"changed"'},
+                          json.dumps([{'status': 'PASS', 'finishedOn': '2024-03-01'}]).encode('utf-8'))
+        statuses = {row['Test Key']: row['Test Status'] for row in self.fetch()}
+        self.assertEqual(statuses['P-T1'], 'PASS')
+
+    def test_incremental_fetch_replays_without_new_cache_entries(self):
+        first = self.fetch(incremental=True)
+        cached_files = sorted(p.name for p in self.cache_dir.iterdir())
+
+        self.assertEqual(self.fetch(incremental=True), first)
+        self.assertEqual(sorted(p.name for p in self.cache_dir.iterdir()), cached_files)
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Answers 503 (with Retry-After) a set number of times, then JSON."""
+
+    protocol_version = 'HTTP/1.1'
+    failures = 0
+    status = 503
+    requests = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            type(self).requests += 1
+            failing = type(self).requests <= self.failures
+        if failing:
+            self.send_response(self.status)
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = json.dumps({'ok': True}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RetryTest(unittest.TestCase):
+
+    def get_json(self, failures, status=503, retries=3):
+        self.handler = handler = type('Handler', (FlakyHandler,),
+                                      {'failures': failures, 'status': status, 'requests': 0})
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        fetcher = XrayFetcher(f'http://127.0.0.1:{server.server_port}', retries=retries, backoff=0)
+
+        async def run():
+            fetcher.pool = ConnectionPool(fetcher.base_url, 2)
+            try:
+                return await fetcher.get_json('/rest/api/2/myself')
+            finally:
+                fetcher.pool.close()
+
+        try:
+            return asyncio.run(run()), handler.requests
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_transient_errors_are_retried(self):
+        self.assertEqual(self.get_json(failures=2), ({'ok': True}, 3))
+
+    def test_gives_up_after_retries(self):
+        with self.assertRaises(JiraFetchError):
+            self.get_json(failures=10, retries=2)
+        self.assertEqual(self.handler.requests, 3)
+
+    def test_client_errors_are_not_retried(self):
+        with self.assertRaises(JiraFetchError):
+            self.get_json(failures=10, status=404)
+        self.assertEqual(self.handler.requests, 1)
+
+
+class UpdatedSinceJqlTest(unittest.TestCase):
+
+    def test_order_by_moves_behind_condition(self):
+        self.assertEqual(updated_since_jql('project = A ORDER BY key ASC', 7),
+                         '(project = A) AND updated >= -7m ORDER BY key ASC')
+
+    def test_plain_query(self):
+        self.assertEqual(updated_since_jql('project = A', 7), '(project = A) AND updated >= -7m')
+
+
+if __name__ == '__main__':
+    unittest.main()